@@ -19,19 +19,18 @@ Options:
 
 
 from argparse import ArgumentParser, ONE_OR_MORE, Action
-from csv import DictReader
-from functools import lru_cache
+from ast import literal_eval
+from csv import DictReader, reader
 from pathlib import Path
-import re
 from sys import stdin
-from typing import Literal, cast
+from typing import BinaryIO, Literal
 
 
 class SetAddAction(Action):
     def __call__(self, parser, namespace, values, option_string=None):
-        items: list = getattr(namespace, self.dest) or []
-        items.extend(value for value in values if value not in items)
-        setattr(namespace, self.dest, items)
+        items = dict.fromkeys(getattr(namespace, self.dest) or [])
+        items.update(dict.fromkeys(values))
+        setattr(namespace, self.dest, list(items))
 
 
 parser = ArgumentParser()
@@ -46,9 +45,7 @@ parser.add_argument(
     action=SetAddAction,
 )
 
-draft_notify_re = re.compile(
-    r"^.*\(Draft\.Notify\): (?P<draft_notify>\{.*\})$",
-)
+draft_notify_marker = b"(Draft.Notify): "
 
 
 columns = {
@@ -100,6 +97,9 @@ Card = dict[
     str,
 ]
 
+# (display label, CardRating attribute, sort direction) per ratings column
+ColumnSpec = list[tuple[str, str, int]]
+
 
 class CardRating:
     name: str  # "Name"
@@ -123,104 +123,68 @@ class CardRating:
     _num_gns: int | None  # "# GNS"
     _gns_wr: float | None  # "GNS WR"
     _iwd: float | None  # "IWD"
-
-    def __init__(self, card: Card) -> None:
+    num_seen: str  # "# Seen"
+    alsa: str  # "ALSA"
+    num_picked: str  # "# Picked"
+    ata: str  # "ATA"
+    num_gp: str  # "# GP"
+    pct_gp: str  # "% GP"
+    gp_wr: str  # "GP WR"
+    num_oh: str  # "# OH"
+    oh_wr: str  # "OH WR"
+    num_gd: str  # "# GD"
+    gd_wr: str  # "GD WR"
+    num_gih: str  # "# GIH"
+    gih_wr: str  # "GIH WR"
+    num_gns: str  # "# GNS"
+    gns_wr: str  # "GNS WR"
+    iwd: str  # "IWD"
+
+    def __init__(self, card: Card, card_id: str) -> None:
         self.card = card
         self.name = card["Name"]
-        self.card_id = int(card["CardID"])
+        self.card_id = int(card_id)
         self.color = card["Color"]
         self.rarity = card["Rarity"]
 
-        self._num_seen = None if not card.get("# Seen") else int(card["# Seen"])
-        self._alsa = None if not card.get("ALSA") else float(card["ALSA"])
-        self._num_picked = None if not card.get("# Picked") else int(card["# Picked"])
-        self._ata = None if not card.get("ATA") else float(card["ATA"])
-        self._num_gp = None if not card.get("# GP") else int(card["# GP"])
-        self._pct_gp = None if not card.get("% GP") else float(card["% GP"].strip("%"))
-        self._gp_wr = None if not card.get("GP WR") else float(card["GP WR"].strip("%"))
-        self._num_oh = None if not card.get("# OH") else int(card["# OH"])
-        self._oh_wr = None if not card.get("OH WR") else float(card["OH WR"].strip("%"))
-        self._num_gd = None if not card.get("# GD") else int(card["# GD"])
-        self._gd_wr = None if not card.get("GD WR") else float(card["GD WR"].strip("%"))
-        self._num_gih = None if not card.get("# GIH") else int(card["# GIH"])
-        self._gih_wr = (
-            None if not card.get("GIH WR") else float(card["GIH WR"].strip("%"))
-        )
-        self._num_gns = None if not card.get("# GNS") else int(card["# GNS"])
-        self._gns_wr = (
-            None if not card.get("GNS WR") else float(card["GNS WR"].strip("%"))
-        )
-        self._iwd = None if not card.get("IWD") else float(card["IWD"].strip("p"))
-
-    @property
-    def num_seen(self) -> str:
-        return str(self._num_seen) or ""
-
-    @property
-    def alsa(self) -> str:
-        return f"{self._alsa:.02f}" if self._alsa is not None else ""
-
-    @property
-    def num_picked(self) -> str:
-        return str(self._num_picked) or ""
-
-    @property
-    def ata(self) -> str:
-        return f"{self._ata:.02f}" if self._ata is not None else ""
-
-    @property
-    def num_gp(self) -> str:
-        return str(self._num_gp) or ""
-
-    @property
-    def pct_gp(self) -> str:
-        return f"{self._pct_gp:02.02f}%" if self._pct_gp is not None else ""
-
-    @property
-    def gp_wr(self) -> str:
-        return f"{self._gp_wr:02.02f}%" if self._gp_wr is not None else ""
-
-    @property
-    def num_oh(self) -> str:
-        return str(self._num_oh) or ""
-
-    @property
-    def oh_wr(self) -> str:
-        return f"{self._oh_wr:02.02f}%" if self._oh_wr is not None else ""
-
-    @property
-    def num_gd(self) -> str:
-        return str(self._num_gd) or ""
-
-    @property
-    def gd_wr(self) -> str:
-        return f"{self._gd_wr:02.02f}%" if self._gd_wr is not None else ""
-
-    @property
-    def num_gih(self) -> str:
-        return str(self._num_gih) or ""
-
-    @property
-    def gih_wr(self) -> str:
-        return f"{self._gih_wr:02.02f}%" if self._gih_wr is not None else ""
-
-    @property
-    def num_gns(self) -> str:
-        return str(self._num_gns) or ""
-
-    @property
-    def gns_wr(self) -> str:
-        return f"{self._gns_wr:02.02f}%" if self._gns_wr is not None else ""
-
-    @property
-    def iwd(self) -> str:
-        return f"{self._iwd:02.02f}" if self._iwd is not None else ""
-
-    def print_columns(self, ratings_columns: list[str]) -> str:
+        self._num_seen = int(v) if (v := card.get("# Seen")) else None
+        self._alsa = float(v) if (v := card.get("ALSA")) else None
+        self._num_picked = int(v) if (v := card.get("# Picked")) else None
+        self._ata = float(v) if (v := card.get("ATA")) else None
+        self._num_gp = int(v) if (v := card.get("# GP")) else None
+        self._pct_gp = float(v.rstrip("%")) if (v := card.get("% GP")) else None
+        self._gp_wr = float(v.rstrip("%")) if (v := card.get("GP WR")) else None
+        self._num_oh = int(v) if (v := card.get("# OH")) else None
+        self._oh_wr = float(v.rstrip("%")) if (v := card.get("OH WR")) else None
+        self._num_gd = int(v) if (v := card.get("# GD")) else None
+        self._gd_wr = float(v.rstrip("%")) if (v := card.get("GD WR")) else None
+        self._num_gih = int(v) if (v := card.get("# GIH")) else None
+        self._gih_wr = float(v.rstrip("%")) if (v := card.get("GIH WR")) else None
+        self._num_gns = int(v) if (v := card.get("# GNS")) else None
+        self._gns_wr = float(v.rstrip("%")) if (v := card.get("GNS WR")) else None
+        self._iwd = float(v.rstrip("p")) if (v := card.get("IWD")) else None
+
+        self.num_seen = "" if self._num_seen is None else str(self._num_seen)
+        self.alsa = f"{self._alsa:.02f}" if self._alsa is not None else ""
+        self.num_picked = "" if self._num_picked is None else str(self._num_picked)
+        self.ata = f"{self._ata:.02f}" if self._ata is not None else ""
+        self.num_gp = "" if self._num_gp is None else str(self._num_gp)
+        self.pct_gp = f"{self._pct_gp:02.02f}%" if self._pct_gp is not None else ""
+        self.gp_wr = f"{self._gp_wr:02.02f}%" if self._gp_wr is not None else ""
+        self.num_oh = "" if self._num_oh is None else str(self._num_oh)
+        self.oh_wr = f"{self._oh_wr:02.02f}%" if self._oh_wr is not None else ""
+        self.num_gd = "" if self._num_gd is None else str(self._num_gd)
+        self.gd_wr = f"{self._gd_wr:02.02f}%" if self._gd_wr is not None else ""
+        self.num_gih = "" if self._num_gih is None else str(self._num_gih)
+        self.gih_wr = f"{self._gih_wr:02.02f}%" if self._gih_wr is not None else ""
+        self.num_gns = "" if self._num_gns is None else str(self._num_gns)
+        self.gns_wr = f"{self._gns_wr:02.02f}%" if self._gns_wr is not None else ""
+        self.iwd = f"{self._iwd:02.02f}" if self._iwd is not None else ""
+
+    def print_columns(self, column_spec: ColumnSpec) -> str:
         return "\t".join(
-            f'{k.strip("-").replace(" ", "_")} = '
-            f'{getattr(card, columns[k.strip("-")]) or " --- "}'
-            for k in ratings_columns
+            f'{label} = {getattr(self, attr) or " --- "}'
+            for label, attr, _ in column_spec
         )
 
 
@@ -265,72 +229,105 @@ class DraftPack:
         self.cards = [ratings_by_id[str(card_id)] for card_id in card_ids]
 
 
-@lru_cache(maxsize=1)
 def build_dict_by_card_id(
     ratings_file: Path,
     ids_file: Path,
 ) -> dict[str, CardRating]:
     ratings_dict: dict[str, CardRating] = {}
-    cards_by_name: dict[str, dict] = {
-        card["Name"].strip(): cast(Card, card)
-        for card in DictReader(ids_file.open("rt", encoding="utf-8"))
-    }
-    for i, ratings in enumerate(
-        DictReader(ratings_file.open("rt", encoding="utf-8-sig"))
-    ):
-        card = cards_by_name[ratings["Name"].strip()]
-        ratings_dict[card["CardID"]] = CardRating(
-            cast(
-                Card,
-                card | ratings,
+    with ids_file.open("rt", encoding="utf-8", newline="") as ids_csv:
+        rows = reader(ids_csv)
+        header = next(rows)
+        name_col, id_col = header.index("Name"), header.index("CardID")
+        ids_by_name: dict[str, str] = {
+            row[name_col].strip(): row[id_col] for row in rows if row
+        }
+    with ratings_file.open("rt", encoding="utf-8-sig", newline="") as ratings_csv:
+        for ratings in DictReader(ratings_csv):
+            name = ratings["Name"]
+            card_id = ids_by_name.get(name) or ids_by_name[name.strip()]
+            ratings_dict[card_id] = CardRating(ratings, card_id)
+    return ratings_dict
+
+
+def build_column_spec(ratings_columns: list[str]) -> ColumnSpec:
+    column_spec: ColumnSpec = []
+    for k in ratings_columns:
+        column = k.lstrip("-")
+        column_spec.append(
+            (
+                column.replace(" ", "_"),
+                columns[column],
+                -1 if k.startswith("-") else 1,
             )
         )
-    return ratings_dict
+    return column_spec
 
 
-if __name__ == "__main__":
-    args = parser.parse_args()
-    print(args)
-    ratings_by_id = build_dict_by_card_id(args.ratings, args.ids)
+def build_sort_keys(
+    ratings_by_id: dict[str, CardRating],
+    column_spec: ColumnSpec,
+) -> dict[CardRating, int]:
+    keys = {
+        card: tuple(
+            sign * (getattr(card, f"_{attr}") or 0) for _, attr, sign in column_spec
+        )
+        for card in ratings_by_id.values()
+    }
+    # Collapse the multi-column keys into one integer rank per card, so that
+    # sorting a pack compares ints instead of tuples.
+    ranks = {key: rank for rank, key in enumerate(sorted(set(keys.values())))}
+    return {card: ranks[key] for card, key in keys.items()}
+
+
+def build_card_lines(
+    ratings_by_id: dict[str, CardRating],
+    column_spec: ColumnSpec,
+) -> dict[CardRating, str]:
+    return {
+        card: (
+            f"{card.print_columns(column_spec)}\t"
+            f"|\t{card.card_id}\t'{card.name}'\t{card.color}\t"
+            f"{card.rarity}"
+        )
+        for card in ratings_by_id.values()
+    }
 
-    while True:
-        line = stdin.readline()
-        if not line:
-            break
-        line = line.strip()
-        if not line:
+
+def process_stream(
+    stream: BinaryIO,
+    ratings_by_id: dict[str, CardRating],
+    column_spec: ColumnSpec,
+) -> None:
+    sort_keys = build_sort_keys(ratings_by_id, column_spec)
+    card_lines = build_card_lines(ratings_by_id, column_spec)
+
+    for line in stream:
+        start = line.find(draft_notify_marker)
+        if start < 0:
             continue
 
-        m = draft_notify_re.match(line)
-        if not m:
+        draft_notify = line[start + len(draft_notify_marker) :].strip()
+        if not draft_notify.startswith(b"{"):
             continue
 
-        pack = DraftPack(ratings_by_id, **eval(m.group("draft_notify")))
+        pack = DraftPack(
+            ratings_by_id, **literal_eval(draft_notify.decode("utf-8"))
+        )
 
         if not pack.cards:
             continue
-        pack.cards.sort(
-            key=lambda card: tuple(
-                (
-                    -(getattr(card, f"_{columns[k[1:]]}") or 0)
-                    if k[0] == "-"
-                    else getattr(card, f"_{columns[k]}") or 0
-                )
-                for k in args.ratings_column
-            ),
-            reverse=True,
-        )
+        pack.cards.sort(key=sort_keys.__getitem__, reverse=True)
         print(
             f"\n\nDraft {pack.draft_id} Pack {pack.pack_number} "
             f"Pick {pack.pick_number}:\n"
         )
         for i, card in enumerate(pack.cards):
-            if not card:
-                continue
-
-            print(
-                f"{i+pack.pick_number:02d}:\t"
-                f"{card.print_columns(args.ratings_column)}\t"
-                f"|\t{card.card_id}\t'{card.name}'\t{card.color}\t"
-                f"{card.rarity}"
-            )
+            print(f"{i+pack.pick_number:02d}:\t{card_lines[card]}")
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    print(args)
+    ratings_by_id = build_dict_by_card_id(args.ratings, args.ids)
+    column_spec = build_column_spec(args.ratings_column)
+    process_stream(stdin.buffer, ratings_by_id, column_spec)